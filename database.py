@@ -16,12 +16,17 @@ hollywoo.database
 (c) 2025 Benjamin Walkenhorst
 """
 
+import json
 import logging
+import os
 import sqlite3
+import sys
+import time
+from collections import defaultdict
 from datetime import datetime
 from enum import IntEnum, auto, unique
-from threading import Lock
-from typing import Final, Optional, Union
+from threading import Lock, local
+from typing import Final, Iterable, Optional, Union
 
 import krylib
 
@@ -71,7 +76,6 @@ CREATE TABLE video (
         ON DELETE CASCADE
 ) STRICT
     """,
-    "CREATE INDEX vid_folder_idx ON video (folder_id)",
     "CREATE INDEX vid_path_idx ON video (path)",
     "CREATE INDEX vid_res_idx ON video (xres, yres)",
     "CREATE INDEX vid_dur_idx ON video (duration)",
@@ -116,8 +120,7 @@ CREATE TABLE tag_vid_link (
       ON DELETE CASCADE
 ) STRICT
     """,
-    "CREATE INDEX tag_link_tag_idx ON tag_vid_link (tag_id)",
-    "CREATE INDEX tag_link_vid_idx ON tag_vid_link (vid_id)",
+    "CREATE INDEX tag_link_vid_idx ON tag_vid_link (vid_id, tag_id)",
     """
 CREATE TABLE person (
     id INTEGER PRIMARY KEY,
@@ -172,12 +175,15 @@ class qid(IntEnum):
     VideoSetMtime = auto()
     VideoGetByID = auto()
     VideoGetByPath = auto()
+    VideoGetByPathPrefix = auto()
     VideoGetByFolder = auto()
     VideoGetAll = auto()
+    VideoGetIDByPaths = auto()
     VideoSetResolution = auto()
     VideoSetDuration = auto()
     VideoSetHidden = auto()
     VideoDelete = auto()
+    VideoDeleteMany = auto()
     ProgramAdd = auto()
     ProgramSetTitle = auto()
     ProgramAddVideo = auto()
@@ -187,6 +193,9 @@ class qid(IntEnum):
     TagLinkCreate = auto()
     TagLinkGetByTag = auto()
     TagLinkGetByVid = auto()
+    TagLinkGetByFolder = auto()
+    TagLinkGetTagIDs = auto()
+    TagLinkGetAllByVid = auto()
     TagLinkRemove = auto()
     TagGetAllVideo = auto()
     TagGetAll = auto()
@@ -199,6 +208,9 @@ class qid(IntEnum):
     LinkPersonDelete = auto()
     LinkPersonGetByPerson = auto()
     LinkPersonGetByVid = auto()
+    LinkPersonGetAll = auto()
+    LinkPersonGetByFolder = auto()
+    LinkPersonGetAllByVid = auto()
 
 
 qdb: dict[qid, str] = {
@@ -246,8 +258,12 @@ INSERT INTO video (folder_id, path, added, mtime, xres, yres, duration)
     qid.VideoSetDuration: "UPDATE video SET duration = ? WHERE id = ?",
     qid.VideoSetHidden: "UPDATE video SET hidden = ? WHERE id = ?",
     qid.VideoDelete: "DELETE FROM video WHERE id = ?",
+    # The IDs are passed as a single JSON array, so the statement text stays the
+    # same, and we do not run into the limit on the number of parameters.
+    qid.VideoDeleteMany: "DELETE FROM video WHERE id IN (SELECT value FROM json_each(?))",
     qid.VideoGetByID: """
 SELECT
+    id,
     folder_id,
     path,
     added,
@@ -265,6 +281,7 @@ WHERE id = ?
 SELECT
     id,
     folder_id,
+    path,
     added,
     mtime,
     title,
@@ -275,10 +292,27 @@ SELECT
     hidden
 FROM video
 WHERE path = ?
+    """,
+    qid.VideoGetByPathPrefix: """
+SELECT
+    id,
+    folder_id,
+    path,
+    added,
+    mtime,
+    title,
+    cksum,
+    xres,
+    yres,
+    duration,
+    hidden
+FROM video
+WHERE path >= ? AND path < ?
     """,
     qid.VideoGetByFolder: """
 SELECT
     id,
+    folder_id,
     path,
     added,
     mtime,
@@ -308,6 +342,10 @@ SELECT
 FROM video
 ORDER BY path
     """,
+    qid.VideoGetIDByPaths: """
+SELECT id, path FROM video
+WHERE folder_id = ? AND path IN (SELECT value FROM json_each(?))
+""",
     qid.ProgramAdd: "INSERT INTO program (title) VALUES (?)",
     qid.ProgramSetTitle: "UPDATE program SET title = ? WHERE id = ?",
     qid.ProgramAddVideo: "INSERT INTO prog_vid_link (prog_id, vid_id) VALUES (?, ?)",
@@ -347,9 +385,8 @@ SELECT
     v.hidden
 FROM tag_vid_link t
 INNER JOIN video v ON t.vid_id = v.id
-INNER JOIN folder f ON v.folder_id = f.id
 WHERE t.tag_id = ?
-ORDER BY f.path, v.path
+ORDER BY v.path
     """,
     qid.TagLinkGetByVid: """
 SELECT
@@ -358,6 +395,27 @@ SELECT
 FROM tag_vid_link l
 INNER JOIN tag t ON l.tag_id = t.id
 WHERE l.vid_id = ?
+ORDER BY t.name
+    """,
+    qid.TagLinkGetByFolder: """
+SELECT
+    l.vid_id,
+    t.id,
+    t.name
+FROM video v
+INNER JOIN tag_vid_link l ON l.vid_id = v.id
+INNER JOIN tag t ON l.tag_id = t.id
+WHERE v.folder_id = ?
+ORDER BY t.name
+    """,
+    qid.TagLinkGetTagIDs: "SELECT DISTINCT tag_id FROM tag_vid_link",
+    qid.TagLinkGetAllByVid: """
+SELECT
+    l.vid_id,
+    t.id,
+    t.name
+FROM tag_vid_link l
+INNER JOIN tag t ON l.tag_id = t.id
 ORDER BY t.name
     """,
     qid.TagGetAllVideo: """
@@ -394,19 +452,88 @@ SELECT
 FROM person_vid_link
 WHERE vid = ?
 """,
+    qid.LinkPersonGetAll: """
+SELECT
+    l.pid,
+    l.role,
+    v.id,
+    v.folder_id,
+    v.path,
+    v.added,
+    v.mtime,
+    v.title,
+    v.cksum,
+    v.xres,
+    v.yres,
+    v.duration,
+    v.hidden
+FROM person_vid_link l
+INNER JOIN video v ON l.vid = v.id
+ORDER BY v.path
+    """,
+    qid.LinkPersonGetByFolder: """
+SELECT
+    l.vid,
+    p.id,
+    p.name,
+    p.born,
+    l.role
+FROM video v
+INNER JOIN person_vid_link l ON l.vid = v.id
+INNER JOIN person p ON l.pid = p.id
+WHERE v.folder_id = ?
+ORDER BY p.name, l.role
+    """,
+    qid.LinkPersonGetAllByVid: """
+SELECT
+    l.vid,
+    p.id,
+    p.name,
+    p.born,
+    l.role
+FROM person_vid_link l
+INNER JOIN person p ON l.pid = p.id
+ORDER BY p.name, l.role
+    """,
 }
 
+# The sqlite3 module caches prepared statements by their SQL text, so we
+# collapse the whitespace in the queries once here and intern the result. None
+# of the queries contain string literals, so this does not change their meaning.
+qdb = {k: sys.intern(" ".join(v.split())) for k, v in qdb.items()}
+
+
+def video_factory(_cur: sqlite3.Cursor, row: tuple) -> Video:
+    """Turn a row from one of the video queries into a Video.
+
+    All queries that return Videos select the same columns in the same order,
+    so we can install this as the row_factory on their cursors.
+    """
+    vid, fid, path, added, mtime, title, cksum, xres, yres, duration, hidden = row
+    return Video(
+        vid=vid,
+        folder_id=fid,
+        path=path,
+        added=datetime.fromtimestamp(added),
+        mtime=datetime.fromtimestamp(mtime),
+        title=title,
+        cksum=cksum,
+        resolution=Resolution(xres, yres),
+        duration=duration,
+        hidden=hidden,
+    )
+
 
 class Database:
     """Database is a wrapper for the database connection."""
 
     __slots__ = [
-        "db",
+        "_local",
         "log",
         "path",
     ]
 
-    db: sqlite3.Connection
+    _local: local
     log: logging.Logger
     path: str
 
@@ -419,72 +546,138 @@ class Database:
         self.log = common.get_logger("database")
         self.log.debug("Open database at %s", self.path)
 
-        uri: Final[str] = \
-            f"file:{self.path}?_locking=NORMAL&_journal=WAL&_fk=1&recursive_triggers=0"
+        self._local = local()
 
         with open_lock:
             exist: Final[bool] = krylib.fexist(self.path)
-            self.db = sqlite3.connect(
-                uri,
-                check_same_thread=False,
-                uri=True,
-                timeout=5.0,
-            )
-
-            cur = self.db.cursor()
-            cur.execute("PRAGMA foreign_keys = true")
-            cur.execute("PRAGMA journal_mode = WAL")
-            cur.close()
-            # self.db.commit()
-            self.db.autocommit = False
+            self.__connect()
 
             if not exist:
                 self.__create_db()
 
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use.
+
+        Each thread gets a connection of its own, so with WAL readers in one
+        thread do not have to wait on writers in another.
+        """
+        try:
+            return self._local.conn
+        except AttributeError:
+            return self.__connect()
+
+    def __connect(self) -> sqlite3.Connection:
+        uri: Final[str] = f"file:{self.path}"
+        conn: Final[sqlite3.Connection] = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=5.0,
+            cached_statements=256,
+        )
+
+        conn.execute("PRAGMA foreign_keys = true")
+        conn.execute("PRAGMA recursive_triggers = false")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # With WAL, synchronous=NORMAL only syncs at checkpoints,
+        # which is still safe against corruption.
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -65536")  # 64 MiB
+        conn.execute("PRAGMA mmap_size = 1073741824")
+        conn.execute("PRAGMA wal_autocheckpoint = 1000")
+        # A read outside of a transaction would otherwise leave one open, and
+        # pin the thread to an old snapshot of the database. Transactions are
+        # opened explicitly by __enter__.
+        conn.autocommit = True
+
+        self._local.conn = conn
+        self._local.depth = 0
+        return conn
+
     def __create_db(self) -> None:
-        with self.db:
-            for q in qinit:
-                self.log.debug("Execute SQL: %s", q)
-                cur: sqlite3.Cursor = self.db.cursor()
-                cur.execute(q)
+        try:
+            self.log.debug("Initialize database schema (%d statements)",
+                           len(qinit))
+            with self:
+                self.db.executescript(";\n".join(qinit))
+                self.db.execute("ANALYZE")
+        except sqlite3.Error as err:
+            self.log.error("%s while initializing database %s: %s",
+                           err.__class__.__name__,
+                           self.path,
+                           err)
+            # Do not leave a half-initialized database behind, or the next
+            # attempt to open it would skip creating the schema.
+            self.close()
+            for suffix in ("", "-wal", "-shm"):
+                if krylib.fexist(self.path + suffix):
+                    os.remove(self.path + suffix)
+            raise DBError(f"Cannot initialize database {self.path}: {err}") from err
 
     def __enter__(self) -> None:
-        self.db.__enter__()
+        conn: Final[sqlite3.Connection] = self.db
+        # Only the outermost block opens and ends the transaction.
+        if self._local.depth == 0:
+            conn.execute("BEGIN")
+        self._local.depth += 1
 
     def __exit__(self, ex_type, ex_val, traceback):
-        return self.db.__exit__(ex_type, ex_val, traceback)
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            if ex_type is not None:
+                self.db.execute("ROLLBACK")
+                return False
+            try:
+                self.db.execute("COMMIT")
+            except sqlite3.Error:
+                self.db.execute("ROLLBACK")
+                raise
+        return False
 
     def close(self) -> None:
-        """Close the underlying database connection explicitly."""
-        self.db.close()
+        """Close the calling thread's database connection explicitly.
+
+        Connections opened by other threads are closed when those threads exit.
+        """
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is not None:
+            del self._local.conn
+            # Let SQLite refresh the planner statistics for tables that have
+            # changed noticeably since they were last analyzed. The connection
+            # is in autocommit mode, so the ANALYZE commits on its own. The
+            # only transaction that can still be open is one that __enter__
+            # began, if we are called inside a with block. close() would roll
+            # that back anyway, so we do it first.
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.execute("PRAGMA optimize")
+            conn.close()
 
     def folder_add(self, f: Folder) -> None:
         """Add a Folder to the database."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.FolderAdd],
-                    (f.path,
-                     int(f.last_scan.timestamp()) if f.last_scan is not None else None,
-                     f.remote))
+        cur = self.db.execute(qdb[qid.FolderAdd],
+                              (f.path,
+                               int(f.last_scan.timestamp()) if f.last_scan is not None else None,
+                               f.remote))
         fid = cur.lastrowid
-        assert fid is not None
+        if fid is None:
+            raise DBError(f"No row ID after adding Folder {f.path}")
         f.fid = fid
 
     def folder_update_scan(self, f: Folder, s: datetime) -> None:
         """Set a Folder's scan timestamp."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.FolderUpdateScan], (int(s.timestamp()), f.fid))
+        self.db.execute(qdb[qid.FolderUpdateScan], (int(s.timestamp()), f.fid))
         f.last_scan = s
 
     def folder_set_remote(self, f: Folder, remote: bool) -> None:
         """Set a Folder's remote flag."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.FolderSetRemote], (remote, f.fid))
+        self.db.execute(qdb[qid.FolderSetRemote], (remote, f.fid))
         f.remote = remote
 
     def folder_get_all(self) -> list[Folder]:
         """Get all Folders from the database."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.FolderGetAll])
+        cur = self.db.execute(qdb[qid.FolderGetAll])
 
         folders: list[Folder] = []
 
@@ -501,8 +694,7 @@ class Database:
 
     def folder_get_by_id(self, fid: int) -> Optional[Folder]:
         """Look up a Folder by its ID."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.FolderGetByID], (fid, ))
+        cur = self.db.execute(qdb[qid.FolderGetByID], (fid, ))
 
         row = cur.fetchone()
 
@@ -520,8 +712,7 @@ class Database:
 
     def folder_get_by_path(self, path: str) -> Optional[Folder]:
         """Look up a Folder by its ID."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.FolderGetByPath], (path, ))
+        cur = self.db.execute(qdb[qid.FolderGetByPath], (path, ))
 
         row = cur.fetchone()
 
@@ -539,209 +730,199 @@ class Database:
 
     def video_add(self, v: Video) -> None:
         """Add a Video to the database."""
-        now: Final[datetime] = datetime.now()
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoAdd],
-                    (v.folder_id,
-                     v.path,
-                     int(now.timestamp()),
-                     int(v.mtime.timestamp()),
-                     v.resolution.x,
-                     v.resolution.y,
-                     v.duration))
-        v.added = now
+        stamp: Final[int] = int(time.time())
+        cur = self.db.execute(qdb[qid.VideoAdd],
+                              (v.folder_id,
+                               v.path,
+                               stamp,
+                               int(v.mtime.timestamp()),
+                               v.resolution.x,
+                               v.resolution.y,
+                               v.duration))
+        v.added = datetime.fromtimestamp(stamp)
         vid = cur.lastrowid
-        assert vid is not None
+        if vid is None:
+            raise DBError(f"No row ID after adding Video {v.path}")
         v.vid = vid
 
+    def video_add_many(self, vids: Iterable[Video]) -> None:
+        """Add several Videos to the database using a single executemany call."""
+        vlist: Final[list[Video]] = list(vids)
+        if len(vlist) == 0:
+            return
+
+        stamp: Final[int] = int(time.time())
+        now: Final[datetime] = datetime.fromtimestamp(stamp)
+        self.db.executemany(qdb[qid.VideoAdd],
+                            [(v.folder_id,
+                              v.path,
+                              stamp,
+                              int(v.mtime.timestamp()),
+                              v.resolution.x,
+                              v.resolution.y,
+                              v.duration) for v in vlist])
+
+        # executemany does not give us the row IDs, so we look them up
+        # afterwards. (folder_id, path) is unique, and covered by an index.
+        # We only ask for the Videos we just added, the Folder may hold
+        # many more.
+        paths: defaultdict[int, list[str]] = defaultdict(list)
+        for v in vlist:
+            paths[v.folder_id].append(v.path)
+        ids: dict[tuple[int, str], int] = {}
+        for fid, fpaths in paths.items():
+            for row in self.db.execute(qdb[qid.VideoGetIDByPaths],
+                                       (fid, json.dumps(fpaths))):
+                ids[(fid, row[1])] = row[0]
+
+        for v in vlist:
+            v.added = now
+            v.vid = ids[(v.folder_id, v.path)]
+
     def video_set_title(self, v: Video, title: str) -> None:
         """Set a Video's title."""
-        self.log.debug("Set title of Video %d (%s) => %s",
-                       v.vid,
-                       v.path,
-                       title)
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoSetTitle],
-                    (title, v.vid))
+        self.db.execute(qdb[qid.VideoSetTitle],
+                        (title, v.vid))
         v.title = title
 
+    def video_set_title_many(self, titles: Iterable[tuple[Video, str]]) -> None:
+        """Set the titles of several Videos using a single executemany call."""
+        tlist: Final[list[tuple[Video, str]]] = list(titles)
+        self.db.executemany(qdb[qid.VideoSetTitle],
+                            [(title, v.vid) for v, title in tlist])
+        for v, title in tlist:
+            v.title = title
+
     def video_set_cksum(self, v: Video, ck: Optional[str]) -> None:
         """Set or clear a Video's Checksum."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoSetCksum],
-                    (ck, v.vid))
+        self.db.execute(qdb[qid.VideoSetCksum],
+                        (ck, v.vid))
         v.cksum = ck
 
     def video_set_mtime(self, v: Video, mtime: datetime) -> None:
         """Update a Videos mtime timestamp."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoSetMtime], (int(mtime.timestamp()), v.vid))
+        self.db.execute(qdb[qid.VideoSetMtime], (int(mtime.timestamp()), v.vid))
         v.mtime = mtime
 
+    def video_set_mtime_many(self, mtimes: Iterable[tuple[Video, datetime]]) -> None:
+        """Update the mtime timestamps of several Videos using a single executemany call."""
+        mlist: Final[list[tuple[Video, datetime]]] = list(mtimes)
+        self.db.executemany(qdb[qid.VideoSetMtime],
+                            [(int(mtime.timestamp()), v.vid) for v, mtime in mlist])
+        for v, mtime in mlist:
+            v.mtime = mtime
+
     def video_set_hidden(self, v: Video, hidden: bool = True) -> None:
         """Set or clear a Video's hidden flag."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoSetHidden], (hidden, v.vid))
+        self.db.execute(qdb[qid.VideoSetHidden], (hidden, v.vid))
         v.hidden = hidden
 
     def video_delete(self, v: Video) -> None:
         """Remove a Video from the database."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoDelete], (v.vid, ))
+        self.db.execute(qdb[qid.VideoDelete], (v.vid, ))
 
-    def video_get_by_id(self, vid: int) -> Optional[Video]:
-        """Look up a Video by its ID."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoGetByID], (vid, ))
-        row = cur.fetchone()
-        if row is None:
-            return None
+    def video_delete_many(self, vids: Iterable[Video]) -> int:
+        """Remove several Videos from the database with a single statement.
 
-        v = Video(
-            vid=vid,
-            folder_id=row[0],
-            path=row[1],
-            added=datetime.fromtimestamp(row[2]),
-            mtime=datetime.fromtimestamp(row[3]),
-            title=row[4],
-            cksum=row[5],
-            resolution=Resolution(row[6], row[7]),
-            duration=row[8],
-            hidden=row[9],
-        )
+        Returns the number of Videos that were deleted.
+        """
+        ids: Final[str] = json.dumps([v.vid for v in vids])
+        cur = self.db.execute(qdb[qid.VideoDeleteMany], (ids, ))
+        return cur.rowcount
 
-        return v
+    def video_get_by_id(self, vid: int) -> Optional[Video]:
+        """Look up a Video by its ID."""
+        cur = self.db.execute(qdb[qid.VideoGetByID], (vid, ))
+        cur.row_factory = video_factory
+        return cur.fetchone()
 
     def video_get_by_path(self, path: str) -> Optional[Video]:
         """Look for a Video by its path."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoGetByPath], (path, ))
-        row = cur.fetchone()
-        if row is None:
-            return None
-        v: Video = Video(
-            vid=row[0],
-            folder_id=row[1],
-            path=path,
-            added=datetime.fromtimestamp(row[2]),
-            mtime=datetime.fromtimestamp(row[3]),
-            title=row[4],
-            cksum=row[5],
-            resolution=Resolution(row[6], row[7]),
-            duration=row[8],
-            hidden=row[9],
-        )
-        return v
+        cur = self.db.execute(qdb[qid.VideoGetByPath], (path, ))
+        cur.row_factory = video_factory
+        return cur.fetchone()
+
+    def video_get_by_path_prefix(self, path: str) -> list[Video]:
+        """Load all Videos below a directory, no matter which Folder they belong to."""
+        prefix: Final[str] = path.rstrip(os.sep) + os.sep
+        # Every path that starts with prefix sorts before the one that has
+        # the next character in place of the trailing separator, so the
+        # index on path can answer this as a range.
+        upper: Final[str] = prefix[:-1] + chr(ord(os.sep) + 1)
+        cur = self.db.execute(qdb[qid.VideoGetByPathPrefix], (prefix, upper))
+        cur.row_factory = video_factory
+        return cur.fetchall()
 
     def video_get_by_folder(self, f: Union[Folder, str, int]) -> list[Video]:
-        """Load all videos that belong to the given folder."""
-        fldr: Optional[Folder] = None
+        """Load all videos that belong to the given folder.
+
+        Only a lookup by path needs to query the folder table first, Folders
+        and IDs are used as they are.
+        """
+        fid: int
         if isinstance(f, Folder):
-            fldr = f
-        elif isinstance(f, str):
-            fldr = self.folder_get_by_path(f)
+            fid = f.fid
         elif isinstance(f, int):
-            fldr = self.folder_get_by_id(f)
-        assert fldr is not None
-        self.log.debug("Load videos for Folder %s (%d)...",
-                       fldr.path,
-                       fldr.fid)
+            fid = f
+        else:
+            fldr: Optional[Folder] = self.folder_get_by_path(f)
+            if fldr is None:
+                raise DBError(f"No Folder with path {f}")
+            fid = fldr.fid
 
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoGetByFolder], (fldr.fid, ))
-        vids: list[Video] = []
+        return self.video_get_by_folder_id(fid)
 
-        for row in cur:
-            v: Video = Video(
-                vid=row[0],
-                folder_id=fldr.fid,
-                path=row[1],
-                added=datetime.fromtimestamp(row[2]),
-                mtime=datetime.fromtimestamp(row[3]),
-                title=row[4],
-                cksum=row[5],
-                resolution=Resolution(row[6], row[7]),
-                duration=row[8],
-                hidden=row[9],
-            )
-            vids.append(v)
+    def video_get_by_folder_id(self, fid: int) -> list[Video]:
+        """Load all videos that belong to the Folder with the given ID."""
+        self.log.debug("Load videos for Folder %d...", fid)
 
-        self.log.debug("Got %d videos for Folder %s",
+        cur = self.db.execute(qdb[qid.VideoGetByFolder], (fid, ))
+        cur.row_factory = video_factory
+        vids: list[Video] = cur.fetchall()
+
+        self.log.debug("Got %d videos for Folder %d",
                        len(vids),
-                       fldr.path)
+                       fid)
 
         return vids
 
     def video_get_all(self) -> list[Video]:
         """Get all videos from the database."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.VideoGetAll])
-
-        vids = []
-
-        for row in cur:
-            v = Video(
-                vid=row[0],
-                folder_id=row[1],
-                path=row[2],
-                added=datetime.fromtimestamp(row[3]),
-                mtime=datetime.fromtimestamp(row[4]),
-                title=row[5],
-                cksum=row[6],
-                resolution=Resolution(row[7], row[8]),
-                duration=row[9],
-                hidden=row[10],
-            )
-
-            vids.append(v)
-
-        return vids
+        cur = self.db.execute(qdb[qid.VideoGetAll])
+        cur.row_factory = video_factory
+        return cur.fetchall()
 
     def tag_add(self, t: Tag) -> None:
         """Add a Tag to the database."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.TagCreate], (t.name, ))
+        cur = self.db.execute(qdb[qid.TagCreate], (t.name, ))
         tid = cur.lastrowid
-        assert tid is not None
+        if tid is None:
+            raise DBError(f"No row ID after adding Tag {t.name}")
         self.log.debug("Create new Tag %s, ID is %d", t.name, tid)
         t.tid = tid
 
     def tag_link_create(self, t: Tag, v: Video) -> None:
         """Attach a Tag to a Video."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.TagLinkCreate],
-                    (t.tid, v.vid))
+        self.db.execute(qdb[qid.TagLinkCreate],
+                        (t.tid, v.vid))
         self.log.debug("Attach Tag %s to Video %s",
                        t.name,
                        v.dsp_title)
 
+    def tag_link_create_many(self, links: Iterable[tuple[Tag, Video]]) -> None:
+        """Attach several Tags to Videos using a single executemany call."""
+        self.db.executemany(qdb[qid.TagLinkCreate],
+                            [(t.tid, v.vid) for t, v in links])
+
     def tag_link_get_by_tag(self, t: Tag) -> list[Video]:
         """Get all Videos that have the given Tag attached."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.TagLinkGetByTag], (t.tid, ))
-        vids: list[Video] = []
-
-        for row in cur:
-            v = Video(
-                vid=row[0],
-                folder_id=row[1],
-                path=row[2],
-                added=datetime.fromtimestamp(row[3]),
-                mtime=datetime.fromtimestamp(row[4]),
-                title=row[5],
-                cksum=row[6],
-                resolution=Resolution(row[7], row[8]),
-                duration=row[9],
-                hidden=row[10],
-            )
-            vids.append(v)
-
-        return vids
+        cur = self.db.execute(qdb[qid.TagLinkGetByTag], (t.tid, ))
+        cur.row_factory = video_factory
+        return cur.fetchall()
 
     def tag_link_get_by_vid(self, v: Video) -> list[Tag]:
         """Get all Tags attached to a Video."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.TagLinkGetByVid], (v.vid, ))
+        cur = self.db.execute(qdb[qid.TagLinkGetByVid], (v.vid, ))
         tags: list[Tag] = []
 
         for row in cur:
@@ -750,6 +931,37 @@ class Database:
 
         return tags
 
+    def tag_link_get_by_folder(self, f: Folder) -> dict[int, list[Tag]]:
+        """Get the Tags attached to all Videos in a Folder, indexed by Video ID.
+
+        Videos without any Tags are not in the dict.
+        """
+        cur = self.db.execute(qdb[qid.TagLinkGetByFolder], (f.fid, ))
+        tags: dict[int, list[Tag]] = {}
+
+        for row in cur:
+            tags.setdefault(row[0], []).append(Tag(tid=row[1], name=row[2]))
+
+        return tags
+
+    def tag_link_get_all_by_vid(self) -> dict[int, list[Tag]]:
+        """Get the Tags attached to all Videos, indexed by Video ID.
+
+        Videos without any Tags are not in the dict.
+        """
+        cur = self.db.execute(qdb[qid.TagLinkGetAllByVid])
+        tags: dict[int, list[Tag]] = {}
+
+        for row in cur:
+            tags.setdefault(row[0], []).append(Tag(tid=row[1], name=row[2]))
+
+        return tags
+
+    def tag_link_get_tag_ids(self) -> set[int]:
+        """Get the IDs of all Tags that are attached to at least one Video."""
+        cur = self.db.execute(qdb[qid.TagLinkGetTagIDs])
+        return {row[0] for row in cur}
+
     # ┌────┬─────────┬────┐
     # │ id │  name   │ id │
     # ├────┼─────────┼────┤
@@ -760,8 +972,7 @@ class Database:
     # └────┴─────────┴────┘
     def tag_get_all_vid(self, v: Video) -> list[tuple[Tag, Optional[int]]]:
         """SELECT a list of all Tags, with the Link ID for that Video, if it is linked."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.TagGetAllVideo], (v.vid, ))
+        cur = self.db.execute(qdb[qid.TagGetAllVideo], (v.vid, ))
         tags: list[tuple[Tag, Optional[int]]] = []
 
         for row in cur:
@@ -772,8 +983,7 @@ class Database:
 
     def tag_get_all(self) -> list[Tag]:
         """Load all Tags."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.TagGetAll])
+        cur = self.db.execute(qdb[qid.TagGetAll])
         tags: list[Tag] = []
 
         for row in cur:
@@ -784,8 +994,7 @@ class Database:
 
     def tag_link_remove(self, t: Tag, v: Video) -> None:
         """Detach a Tag from a Video."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.TagLinkRemove], (t.tid, v.vid))
+        cur = self.db.execute(qdb[qid.TagLinkRemove], (t.tid, v.vid))
         if cur.rowcount == 0:
             self.log.error("Looks like Tag %s wasn't attaced to Video %s after all",
                            t.name,
@@ -793,8 +1002,7 @@ class Database:
 
     def person_add(self, p: Person) -> None:
         """Add a Person to the database."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.PersonAdd], (p.name, p.born))
+        cur = self.db.execute(qdb[qid.PersonAdd], (p.name, p.born))
 
         pid = cur.lastrowid
         if pid is not None:
@@ -804,20 +1012,17 @@ class Database:
 
     def person_update_name(self, p: Person, name: str) -> None:
         """Update a Person's name."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.PersonUpdateName], (name, p.pid))
+        self.db.execute(qdb[qid.PersonUpdateName], (name, p.pid))
         p.name = name
 
     def person_update_born(self, p: Person, born: Optional[int]) -> None:
         """Update Person's year of birth."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.PersonUpdateBorn], (born, p.pid))
+        self.db.execute(qdb[qid.PersonUpdateBorn], (born, p.pid))
         p.born = born
 
     def person_get_by_id(self, pid: int) -> Optional[Person]:
         """Lookup a Person by their ID."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.PersonGetByID], (pid, ))
+        cur = self.db.execute(qdb[qid.PersonGetByID], (pid, ))
 
         row = cur.fetchone()
         if row is None:
@@ -830,8 +1035,7 @@ class Database:
 
     def person_get_all(self) -> list[Person]:
         """Load all people from the database."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.PersonGetAll])
+        cur = self.db.execute(qdb[qid.PersonGetAll])
 
         people: list[Person] = []
 
@@ -846,19 +1050,16 @@ class Database:
     def person_link_add(self, p: Person, v: Video, role: str) -> None:
         """Link a Person to a Video."""
         assert role != ""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.LinkPersonAdd], (p.pid, v.vid, role))
+        self.db.execute(qdb[qid.LinkPersonAdd], (p.pid, v.vid, role))
 
     def person_link_remove(self, p: Person, v: Video, role: str) -> None:
         """Remove a link between a Person and a Video."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.LinkPersonDelete],
-                    (p.pid, v.vid, role))
+        self.db.execute(qdb[qid.LinkPersonDelete],
+                        (p.pid, v.vid, role))
 
     def person_link_get_by_person(self, p: Person) -> list[tuple[Video, str]]:
         """Get a list of all Videos this person is linked to."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.LinkPersonGetByPerson], (p.pid, ))
+        cur = self.db.execute(qdb[qid.LinkPersonGetByPerson], (p.pid, ))
 
         links: list[tuple[int, str]] = []
 
@@ -874,10 +1075,47 @@ class Database:
 
         return vids
 
+    def person_link_get_all(self) -> dict[int, list[tuple[Video, str]]]:
+        """Get the Videos and roles for all People that are linked to any, indexed by Person ID."""
+        cur = self.db.execute(qdb[qid.LinkPersonGetAll])
+        links: dict[int, list[tuple[Video, str]]] = {}
+
+        for row in cur:
+            links.setdefault(row[0], []).append((video_factory(cur, row[2:]), row[1]))
+
+        return links
+
+    def person_link_get_by_folder(self, f: Folder) -> dict[int, list[tuple[Person, str]]]:
+        """Get the People and roles linked to all Videos in a Folder, indexed by Video ID.
+
+        Videos without any People are not in the dict.
+        """
+        cur = self.db.execute(qdb[qid.LinkPersonGetByFolder], (f.fid, ))
+        links: dict[int, list[tuple[Person, str]]] = {}
+
+        for row in cur:
+            links.setdefault(row[0], []).append(
+                (Person(pid=row[1], name=row[2], born=row[3]), row[4]))
+
+        return links
+
+    def person_link_get_all_by_vid(self) -> dict[int, list[tuple[Person, str]]]:
+        """Get the People and roles linked to all Videos, indexed by Video ID.
+
+        Videos without any People are not in the dict.
+        """
+        cur = self.db.execute(qdb[qid.LinkPersonGetAllByVid])
+        links: dict[int, list[tuple[Person, str]]] = {}
+
+        for row in cur:
+            links.setdefault(row[0], []).append(
+                (Person(pid=row[1], name=row[2], born=row[3]), row[4]))
+
+        return links
+
     def person_link_get_by_video(self, v: Video) -> list[tuple[Person, str]]:
         """Return a list of all people linked to a given Video."""
-        cur = self.db.cursor()
-        cur.execute(qdb[qid.LinkPersonGetByVid], (v.vid, ))
+        cur = self.db.execute(qdb[qid.LinkPersonGetByVid], (v.vid, ))
 
         links: list[tuple[int, str]] = []
 
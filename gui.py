@@ -14,19 +14,22 @@
 hollywoo.gui
 
 (c) 2025 Benjamin Walkenhorst
+
+The GTK thread owns all widgets, data stores and GUI.vids. The scan pool
+only reads the database and hands its results over via glib.idle_add, or
+sends a Message through GUI.notify. That is why the GUI needs no locks.
 """
 
 import os
-import subprocess
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from enum import Enum, auto
-from queue import Empty, Queue, ShutDown
-from threading import Lock, Thread
-from typing import Any, Final, NamedTuple, Optional
+from threading import Event
+from typing import Any, Callable, Final, Iterable, Iterator, NamedTuple, Optional
 
 import gi  # type: ignore
-import krylib
 
 from hollywoo import common
 from hollywoo.config import Config
@@ -88,6 +91,89 @@ person_cols: Final[list[tuple[str, type]]] = [
 
 roles: Final[list[str]] = ["Actor", "Director"]
 
+# The number of Video rows we insert per idle callback.
+insert_chunk_size: Final[int] = 256
+
+# The column types never change, so we compute them only once.
+root_col_types: Final[tuple[type, ...]] = tuple(c[1] for c in root_cols)
+# vid_store has one more column than the view shows, it tells the
+# TreeModelFilter if the Video is visible.
+vid_col_types: Final[tuple[type, ...]] = tuple(c[1] for c in vid_cols) + (bool, )
+vid_visible_col: Final[int] = len(vid_cols)
+tag_col_types: Final[tuple[type, ...]] = tuple(c[1] for c in tag_cols)
+person_col_types: Final[tuple[type, ...]] = tuple(c[1] for c in person_cols)
+
+
+def _build_cols(view: gtk.TreeView,
+                cols: list[tuple[str, type]],
+                reorderable: bool,
+                fixed_width: int = 0) -> None:
+    """Add a text column to the TreeView for each entry in cols.
+
+    All columns of a view share one CellRendererText, the TreeViewColumns
+    only map its text property to their own column of the model.
+    If fixed_width is given, the columns use fixed sizing, which allows the
+    view to be put into fixed height mode.
+    """
+    renderer = gtk.CellRendererText()
+    renderer.set_property("editable", False)
+    for i, (title, _t) in enumerate(cols):
+        col = gtk.TreeViewColumn(title, renderer, text=i)
+        col.set_reorderable(reorderable)
+        col.set_resizable(True)
+        if fixed_width > 0:
+            col.set_sizing(gtk.TreeViewColumnSizing.FIXED)
+            col.set_fixed_width(fixed_width)
+        view.append_column(col)
+
+
+@contextmanager
+def _detached(view: gtk.TreeView) -> Iterator[None]:
+    """Detach the TreeView from its model for the duration of the block.
+
+    The view then does not have to process a signal for every row we add.
+    """
+    model = view.get_model()
+    view.freeze_child_notify()
+    view.set_model(None)
+    try:
+        yield
+    finally:
+        view.set_model(model)
+        view.thaw_child_notify()
+
+
+def _people_str(links: Iterable[tuple[Person, str]]) -> str:
+    """Format the People linked to a Video for the People column."""
+    return ", ".join([f"{p.name} ({role})" for p, role in links])
+
+
+def _folder_rows(fldr: Folder,
+                 vids: list[Video],
+                 tags: dict[int, list[Tag]],
+                 people: dict[int, list[tuple[Person, str]]]) \
+        -> tuple[tuple, list[tuple], dict[int, set[int]]]:
+    """Build the rows for a Folder and its Videos, and the Tag IDs for each Video."""
+    root_row = (
+        fldr.fid,
+        fldr.path,
+        fldr.last_scan_str,
+        fldr.remote,
+    )
+    rows = [
+        (v.vid,
+         v.path,
+         v.title,
+         v.res_str,
+         v.dur_str,
+         ", ".join([x.name for x in tags.get(v.vid, ())]),
+         _people_str(people.get(v.vid, ())),
+         not v.hidden)
+        for v in vids
+    ]
+    tag_ids = {v.vid: {t.tid for t in tags[v.vid]} for v in vids if v.vid in tags}
+    return root_row, rows, tag_ids
+
 
 class MsgType(Enum):
     """MsgType identifies a type of event the GUI thread might want to know about."""
@@ -110,11 +196,44 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
 
     def __init__(self) -> None:
         self.log = common.get_logger("gui")
-        self.lock = Lock()
         self.db = Database()
-        self.mq: Queue[Message] = Queue()
+        self.scan_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="scan")
+        # The pool's workers are not daemon threads, the interpreter waits for
+        # them on exit. So we tell running Scanners to stop when we quit.
+        self._scan_stop: Event = Event()
         self.display_hidden: bool = False
         self.vids: dict[int, Video] = {}
+        # The IDs of the Tags attached to each Video in vid_store.
+        self._vid_tags: dict[int, set[int]] = {}
+        # The context menu for Videos lists all Tags and People, and the
+        # roles each Person has in the Video. We keep those in memory rather
+        # than query them whenever the menu is opened.
+        self._tags_cache: Optional[list[Tag]] = None
+        self._people_cache: Optional[list[Person]] = None
+        self._vid_people: defaultdict[int, set[tuple[int, str]]] = defaultdict(set)
+        # Video rows waiting to be inserted, and the sort order of vid_store
+        # while the insertion is in progress.
+        self._pending_rows: deque[tuple] = deque()
+        self._vid_sort: Optional[tuple[Optional[int], gtk.SortType]] = None
+        # TreeStore iters stay valid as long as their row exists, so we can
+        # keep them around to find the rows for a Tag or a tagged Video.
+        self._tag_iter: dict[int, gtk.TreeIter] = {}
+        self._tag_child_iter: dict[tuple[int, int], gtk.TreeIter] = {}
+        self._person_iter: dict[int, gtk.TreeIter] = {}
+        self._person_child_iter: dict[tuple[int, int, str], gtk.TreeIter] = {}
+        # ListStore iters persist, too. These also tell which Folders and
+        # Videos have rows already, so a reload only touches what changed.
+        self._root_iter: dict[int, gtk.TreeIter] = {}
+        self._vid_iter: dict[int, gtk.TreeIter] = {}
+        # The IDs of the Tags whose Video rows have been loaded.
+        self._tag_loaded: set[int] = set()
+        self._vid_cols_built: bool = False
+        self._msg_handlers: dict[MsgType, Callable[[Any], None]] = {
+            MsgType.NothingBurger: self._on_nothing,
+            MsgType.ScanComplete: self._on_scan_complete,
+            MsgType.ScanError: self._on_scan_error,
+            MsgType.PlayFinished: self._on_play_finished,
+        }
 
         self.cfg: Config = Config()
         self.display_hidden = self.cfg.get("GUI", "DisplayHidden")
@@ -169,6 +288,8 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
         # Register signal handlers
 
         self.win.connect("destroy", self._quit)
+        self.notebook.connect("switch-page", self._on_switch_page)
+        self.tag_view.connect("row-expanded", self._tag_row_expanded_cb)
 
         self.fm_item_quit.connect("activate", self._quit)
         self.fm_item_add.connect("activate", self.handle_add_folder)
@@ -184,7 +305,6 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
         self.vid_view.connect("button-press-event",
                               self._handle_vid_view_click)
 
-        glib.timeout_add(500, self.check_queue)
         # TODO I really should listen for changes in size or position, this is
         #      rather crude.
         # self.win.connect("window-state-event", self._save_window_state)
@@ -195,10 +315,12 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
         self.win.show_all()
         self.win.visible = True
 
-        glib.timeout_add(50, self._load_data)
-        glib.timeout_add(60, self._load_tags)
-        glib.timeout_add(70, self._load_people)
         glib.timeout_add(25, self._restore_window_state)
+        # Idle callbacks run in the order they were added, as soon as the
+        # main loop has nothing else to do.
+        glib.idle_add(self._load_data)
+        glib.idle_add(self._load_tags)
+        glib.idle_add(self._load_people)
 
     def __create_menus(self) -> None:
         self.menubar = gtk.MenuBar()
@@ -243,73 +365,58 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
         self.menu_debug.add(self.dbg_wstate_item)
 
     def __create_views(self) -> None:
-        self.root_store = gtk.ListStore(*(c[1] for c in root_cols))
+        self.root_store = gtk.ListStore(*root_col_types)
         self.root_view = gtk.TreeView(model=self.root_store)
         self.root_sw = gtk.ScrolledWindow.new(None, None)
         self.root_sw.set_vexpand(True)
         self.root_sw.set_hexpand(True)
 
-        for c in ((i, root_cols[i][0]) for i in range(len(root_cols))):
-            col = gtk.TreeViewColumn(c[1],
-                                     gtk.CellRendererText(),
-                                     text=c[0],
-                                     editable=False,
-                                     size=12)
-            col.set_reorderable(True)
-            col.set_resizable(True)
-            self.root_view.append_column(col)
-
-        self.vid_store = gtk.ListStore(*(c[1] for c in vid_cols))
+        _build_cols(self.root_view, root_cols, True)
+
+        self.vid_store = gtk.ListStore(*vid_col_types)
         self.vid_filter = self.vid_store.filter_new()
-        self.vid_filter.set_visible_func(self._vid_visible_fn)
-        self.vid_view = gtk.TreeView(model=self.vid_filter)
+        self.vid_filter.set_visible_column(vid_visible_col)
+        self.vid_view = gtk.TreeView(model=self._vid_model())
         self.vid_sw = gtk.ScrolledWindow.new(None, None)
         self.vid_sw.set_vexpand(True)
         self.vid_sw.set_hexpand(True)
 
-        for c in ((i, vid_cols[i][0]) for i in range(len(vid_cols))):
-            col = gtk.TreeViewColumn(c[1],
-                                     gtk.CellRendererText(),
-                                     text=c[0],
-                                     editable=False,
-                                     size=12)
-            col.set_reorderable(True)
-            col.set_resizable(True)
-            self.vid_view.append_column(col)
-
-        self.tag_store = gtk.TreeStore(*(c[1] for c in tag_cols))
+        # The columns for vid_view are built when the Videos page is shown
+        # for the first time, see _on_switch_page.
+
+        self.tag_store = gtk.TreeStore(*tag_col_types)
         self.tag_view = gtk.TreeView.new_with_model(self.tag_store)
         self.tag_sw = gtk.ScrolledWindow.new(None, None)
         self.tag_sw.set_vexpand(True)
         self.tag_sw.set_hexpand(True)
 
-        for c in ((i, tag_cols[i][0]) for i in range(len(tag_cols))):
-            col = gtk.TreeViewColumn(
-                c[1],
-                gtk.CellRendererText(),
-                text=c[0],
-                size=12,
-                editable=False,
-            )
-            col.set_resizable(True)
-            self.tag_view.append_column(col)
-
-        self.person_store = gtk.TreeStore(*(c[1] for c in person_cols))
+        _build_cols(self.tag_view, tag_cols, False)
+
+        self.person_store = gtk.TreeStore(*person_col_types)
         self.person_view = gtk.TreeView.new_with_model(self.person_store)
         self.person_sw = gtk.ScrolledWindow.new(None, None)
         self.person_sw.set_vexpand(True)
         self.person_sw.set_hexpand(True)
 
-        for c in ((i, person_cols[i][0]) for i in range(len(person_cols))):
-            col = gtk.TreeViewColumn(
-                c[1],
-                gtk.CellRendererText(),
-                text=c[0],
-                size=12,
-                editable=False,
-            )
-            col.set_resizable(True)
-            self.person_view.append_column(col)
+        _build_cols(self.person_view, person_cols, False)
+
+    def _on_switch_page(self, _nb, page: gtk.Widget, _num: int) -> None:
+        if page is self.vid_sw and not self._vid_cols_built:
+            # All rows have the same height, so GTK does not need to
+            # measure each one of them.
+            _build_cols(self.vid_view, vid_cols, True, 120)
+            self.vid_view.set_fixed_height_mode(True)
+            self._vid_cols_built = True
+
+    def _vid_model(self) -> gtk.TreeModel:
+        """Return the model vid_view should display.
+
+        The filter can only hide the rows marked invisible, so to show hidden
+        Videos as well, the view uses vid_store directly.
+        """
+        if self.display_hidden:
+            return self.vid_store
+        return self.vid_filter
 
     def _restore_window_state(self, *_ignore: Any) -> bool:
         size = self.cfg.get("GUI", "Size")
@@ -358,119 +465,263 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
             dlg.destroy()
 
     def _reload_data(self, *_ignore) -> None:
-        """Clear and re-fill all data stores."""
-        self.root_store.clear()
-        self.vid_store.clear()
-        self.tag_store.clear()
-        self.vids.clear()
-        self.vid_filter.refilter()
+        """Re-read all data stores.
 
+        The Folder and Video rows are synced with the database, the Tag and
+        People stores are re-filled once their rows have been read.
+        """
         self._load_data()
         self._load_tags()
+        self._load_people()
 
-    def _load_data(self) -> None:
-        folders = self.db.folder_get_all()
-        for f in folders:
-            glib.timeout_add(100, self.load_folder, f)
+    def _load_data(self) -> bool:
+        # Only the rows that exist now can be stale by the time the snapshot
+        # arrives. Rows a scan adds in the meantime are newer than it.
+        loaded: Final = (set(self._root_iter), set(self._vid_iter))
+        self.scan_pool.submit(self._read_all, loaded)
+        return False
 
-        vids = self.db.video_get_all()
+    def _read_all(self, loaded: tuple[set[int], set[int]]) -> None:
+        """Read the rows for all Folders and hand them to the GUI thread.
+
+        This takes four queries in total, no matter how many Folders there are.
+        This method is intended to be run by the scan pool.
+        """
+        try:
+            with self.db:
+                folders = self.db.folder_get_all()
+                vids = self.db.video_get_all()
+                tags = self.db.tag_link_get_all_by_vid()
+                people = self.db.person_link_get_all_by_vid()
+        except Exception as err:  # pylint: disable-msg=W0718
+            self.log.error("%s while loading data: %s",
+                           err.__class__.__name__,
+                           err)
+            return
+
+        by_folder: defaultdict[int, list[Video]] = defaultdict(list)
         for v in vids:
-            self.vids[v.vid] = v
+            by_folder[v.folder_id].append(v)
+        batches = [_folder_rows(f, by_folder[f.fid], tags, people) for f in folders]
+
+        glib.idle_add(self._apply_all, loaded, vids, batches)
+
+    def _apply_all(self,
+                   loaded: tuple[set[int], set[int]],
+                   vids: list[Video],
+                   batches: list[tuple[tuple, list[tuple], dict[int, set[int]]]]) -> bool:
+        """Sync the Folder and Video stores with a snapshot of the database.
+
+        loaded holds the IDs of the Folders and Videos that had rows when the
+        snapshot was requested. Those of them that are not in the snapshot are
+        gone and their rows are removed. Rows for new Folders and Videos are
+        added. Rows that exist already are updated if their values differ from
+        the snapshot.
+        """
+        loaded_fids, loaded_vids = loaded
+        snapshot_vids: Final[dict[int, Video]] = {v.vid: v for v in vids}
+        gone_vids = (loaded_vids - snapshot_vids.keys()) & self._vid_iter.keys()
+        gone_fids = (loaded_fids - {b[0][0] for b in batches}) & self._root_iter.keys()
+        if gone_vids:
+            with _detached(self.vid_view):
+                for vid in gone_vids:
+                    self.vid_store.remove(self._vid_iter.pop(vid))
+                    self.vids.pop(vid, None)
+                    self._vid_tags.pop(vid, None)
+        for fid in gone_fids:
+            self.root_store.remove(self._root_iter.pop(fid))
+        self.vids.update(snapshot_vids)
+
+        for b in batches:
+            self._apply_folder_rows(*b)
+        return False
+
+    def _all_tags(self) -> list[Tag]:
+        """Return all Tags, loading them from the database if needed."""
+        if self._tags_cache is None:
+            self._tags_cache = self.db.tag_get_all()
+        return self._tags_cache
+
+    def _all_people(self) -> list[Person]:
+        """Return all People, loading them from the database if needed."""
+        if self._people_cache is None:
+            self._people_cache = self.db.person_get_all()
+        return self._people_cache
 
     def _load_tags(self) -> None:
-        tags = self.db.tag_get_all()
+        self.scan_pool.submit(self._read_tags)
 
-        for t in tags:
-            titer = self.tag_store.append(None)
-            self.tag_store.set(titer, (0, 1), (t.tid, t.name))
-            vids = self.db.tag_link_get_by_tag(t)
+    def _read_tags(self) -> None:
+        """Read the Tags and hand them to the GUI thread.
+
+        This method is intended to be run by the scan pool.
+        """
+        try:
+            with self.db:
+                tags = self.db.tag_get_all()
+                linked = self.db.tag_link_get_tag_ids()
+        except Exception as err:  # pylint: disable-msg=W0718
+            self.log.error("%s while loading Tags: %s",
+                           err.__class__.__name__,
+                           err)
+            return
+
+        glib.idle_add(self._apply_tags, tags, linked)
+
+    def _apply_tags(self, tags: list[Tag], linked: set[int]) -> bool:
+        self._tags_cache = tags
+        # The store is cleared right before it is re-filled, so the GUI never
+        # sees an empty store while a reload is underway, and a second reload
+        # that overlaps the first does not add every Tag twice.
+        with _detached(self.tag_view):
+            self.tag_store.clear()
+            self._tag_iter.clear()
+            self._tag_child_iter.clear()
+            self._tag_loaded.clear()
+            for t in tags:
+                # append() leaves the columns we pass None for unset.
+                titer = self.tag_store.append(None, [t.tid, t.name, None, None, None, None])
+                self._tag_iter[t.tid] = titer
+                if t.tid in linked:
+                    # An empty child row gives the Tag an expander, the Videos
+                    # are loaded by _tag_row_expanded_cb.
+                    self.tag_store.append(titer, [None, None, None, None, None, None])
+                else:
+                    self._tag_loaded.add(t.tid)
+        return False
+
+    def _tag_row_expanded_cb(self, _view, titer: gtk.TreeIter, _path) -> None:
+        tid: Final[int] = self.tag_store.get_value(titer, 0)
+        if tid in self._tag_loaded:
+            return
 
-            for v in vids:
-                viter = self.tag_store.append(titer)
-                self.tag_store.set(viter,
-                                   (2, 3, 4, 5),
-                                   (v.vid, v.dsp_title, v.res_str, v.dur_str))
+        placeholder = self.tag_store.iter_children(titer)
+        tag = Tag(tid=tid, name=self.tag_store.get_value(titer, 1))
+        for v in self.db.tag_link_get_by_tag(tag):
+            self._tag_child_iter[(tid, v.vid)] = self.tag_store.append(
+                titer,
+                [None, None, v.vid, v.dsp_title, v.res_str, v.dur_str])
+        # Removing the placeholder only after adding the Videos keeps the
+        # row from collapsing again.
+        self.tag_store.remove(placeholder)
+        self._tag_loaded.add(tid)
 
     def _load_people(self) -> None:
-        people = self.db.person_get_all()
-
-        for p in people:
-            piter = self.person_store.append(None)
-            self.person_store.set(piter,
-                                  (0, 1, 2),
-                                  (p.pid,
-                                   p.name,
-                                   p.born))
-
-            vids = self.db.person_link_get_by_person(p)
-
-            for v in vids:
-                viter = self.person_store.append(piter)
-                self.person_store.set(viter,
-                                      (3, 4, 5, 6, 7),
-                                      (v[1],
-                                       v[0].vid,
-                                       v[0].dsp_title,
-                                       v[0].res_str,
-                                       v[0].dur_str))
+        self.scan_pool.submit(self._read_people)
+
+    def _read_people(self) -> None:
+        """Read the People and their Videos and hand them to the GUI thread.
+
+        This method is intended to be run by the scan pool.
+        """
+        try:
+            with self.db:
+                people = self.db.person_get_all()
+                links = self.db.person_link_get_all()
+        except Exception as err:  # pylint: disable-msg=W0718
+            self.log.error("%s while loading People: %s",
+                           err.__class__.__name__,
+                           err)
+            return
+
+        glib.idle_add(self._apply_people, people, links)
+
+    def _apply_people(self,
+                      people: list[Person],
+                      links: dict[int, list[tuple[Video, str]]]) -> bool:
+        self._people_cache = people
+        # See _apply_tags
+        with _detached(self.person_view):
+            self.person_store.clear()
+            self._person_iter.clear()
+            self._person_child_iter.clear()
+            self._vid_people.clear()
+            for p in people:
+                piter = self.person_store.append(
+                    None,
+                    [p.pid, p.name, p.born, None, None, None, None, None])
+                self._person_iter[p.pid] = piter
+
+                for v in links.get(p.pid, ()):
+                    self._vid_people[v[0].vid].add((p.pid, v[1]))
+                    self._person_child_iter[(p.pid, v[0].vid, v[1])] = self.person_store.append(
+                        piter,
+                        [None,
+                         None,
+                         None,
+                         v[1],
+                         v[0].vid,
+                         v[0].dsp_title,
+                         v[0].res_str,
+                         v[0].dur_str])
+        return False
 
     def _purge(self, _ignore) -> None:
-        """Remove any videos from the database that no longer exist in the file system."""
-        del_cnt: int = 0
-        del_ids: list[int] = []
+        """Remove any videos from the database that no longer exist in the file system.
+
+        The file system is checked on the scan pool, so the GUI stays responsive
+        even if some of the Folders are on a slow network share.
+        """
+        self.scan_pool.submit(self._find_missing, list(self.vids.values()))
+
+    def _find_missing(self, vids: list[Video]) -> None:
+        """Check which Videos no longer exist and hand them to the GUI thread.
+
+        This method is intended to be run by the scan pool.
+        """
+        # stat(2) releases the GIL, so the checks can overlap.
+        with ThreadPoolExecutor(max_workers=16, thread_name_prefix="purge") as pool:
+            exist = list(pool.map(os.path.isfile, (v.path for v in vids)))
+
+        missing = [v for v, ok in zip(vids, exist) if not ok]
+        if missing:
+            glib.idle_add(self._purge_missing, missing)
+
+    def _purge_missing(self, missing: list[Video]) -> bool:
+        for vid in missing:
+            self.log.debug("Video %s appears to not exist anymore.",
+                           vid.dsp_title)
+            self.vids.pop(vid.vid, None)
         with self.db:
-            for v_id, vid in self.vids.items():
-                if not os.path.isfile(vid.path):
-                    self.log.debug("Video %s appears to not exist anymore.",
-                                   vid.dsp_title)
-                    self.db.video_delete(vid)
-                    del_ids.append(v_id)
-                    del_cnt += 1
-        if del_cnt > 0:
-            self.log.debug("Removed %d deleted Videos from database, reloading data stores.""",
-                           del_cnt)
-            for v in del_ids:
-                del self.vids[v]
-            self._reload_data()
+            self.db.video_delete_many(missing)
+
+        self.log.debug("Removed %d deleted Videos from database, reloading data stores.""",
+                       len(missing))
+        self._reload_data()
+        return False
 
     def run(self):
         """Execute the Gtk event loop."""
         gtk.main()
 
     def _quit(self, *_ignore):
+        # Config.update writes the whole file, so we save this setting once
+        # on the way out rather than every time it is toggled.
+        self.cfg.update("GUI", "DisplayHidden", self.display_hidden)
+        self._scan_stop.set()
+        self.scan_pool.shutdown(wait=False, cancel_futures=True)
+        self.db.close()
         self.win.destroy()
         gtk.main_quit()
 
-    def check_queue(self) -> bool:
-        """Get any pending messages from the queue and handle them."""
-        status: bool = True
-        try:
-            while not self.mq.empty():
-                msg = self.mq.get_nowait()
-                glib.timeout_add(100, self.handle_msg, msg)
-        except Empty:
-            pass
-        except ShutDown:
-            status = False
-        return status
+    def notify(self, msg: Message) -> None:
+        """Pass a Message to the GUI thread.
+
+        This method is safe to call from any thread. handle_msg runs on the
+        GUI thread as soon as the main loop is idle.
+        """
+        glib.idle_add(self.handle_msg, msg)
 
     def handle_msg(self, msg: Message) -> bool:
         """Process a message about an event we received from another thread."""
         self.log.debug("Handle Message %s", msg.tag)
+        handler = self._msg_handlers.get(msg.tag)
+        if handler is None:
+            self.log.error("No handler for message of type %s", msg.tag)
+            return False
+
         try:
-            match msg.tag:
-                case MsgType.NothingBurger:
-                    self.log.debug("NothingBurger? R U kidding me right now?!")
-                case MsgType.ScanComplete:
-                    assert isinstance(msg.payload, Folder)
-                    fldr: Folder = msg.payload
-                    self.log.debug("Scan of %s finished.", fldr.path)
-                    glib.timeout_add(50, self.load_folder, fldr)
-                case MsgType.ScanError:
-                    self.log.error("An error occured during a scan: %s",
-                                   msg.payload)
-                case MsgType.PlayFinished:
-                    self.log.debug("Finished playing a Video. Yay!")
+            handler(msg.payload)
         except Exception as err:  # pylint: disable-msg=W0718
             self.log.error("%s while handling message of type %s: %s",
                            err.__class__.__name__,
@@ -479,6 +730,20 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
 
         return False
 
+    def _on_nothing(self, _payload: Any) -> None:
+        self.log.debug("NothingBurger? R U kidding me right now?!")
+
+    def _on_scan_complete(self, fldr: Folder) -> None:
+        assert isinstance(fldr, Folder)
+        self.log.debug("Scan of %s finished.", fldr.path)
+
+    def _on_scan_error(self, err: str) -> None:
+        self.log.error("An error occured during a scan: %s", err)
+
+    def _on_play_finished(self, payload: tuple[Video, int]) -> None:
+        v, status = payload
+        self.log.debug("Finished playing %s (status %d). Yay!", v.dsp_title, status)
+
     def handle_add_folder(self, *_ignore) -> None:
         """Prompt the user for a Folder and add it if needed."""
         self.log.debug("Handle add folder")
@@ -503,58 +768,124 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
         finally:
             dlg.destroy()
 
-        thr = Thread(target=self.scan_folder,
-                     args=(path, ),
-                     name=f"Scan {path}",
-                     daemon=True)
-        thr.start()
+        self.scan_pool.submit(self.scan_folder, path)
 
     def scan_folder(self, path: str) -> None:
         """scan_folder creates and runs the Scanner on a folder.
 
-        This method is intended to be called in a separate thread.
+        This method is intended to be run by the scan pool.
         """
         self.log.debug("About to scan folder %s", path)
         try:
-            scn: Scanner = Scanner(path)
+            scn: Scanner = Scanner(path, self._scan_stop)
             fldr = scn.scan()
+            if self._scan_stop.is_set():
+                return
             self.log.debug("Finished scanning %s, informing the UI thread.", path)
+            # We are on the scan pool already, so we read the rows for the
+            # GUI right here instead of handing the Folder back and forth.
+            self._read_folder(fldr)
             msg = Message(MsgType.ScanComplete, fldr)
-            self.mq.put(msg)
+            self.notify(msg)
+        except Exception as err:  # pylint: disable-msg=W0718
+            # The executor would keep the exception in a Future nobody looks at.
+            self.notify(Message(MsgType.ScanError, f"{path}: {err}"))
         finally:
             self.log.debug("Scanner thread for folder %s is quitting.",
                            path)
 
-    def load_folder(self, fldr: Folder) -> None:
-        """Load the videos that scanning the given folder yielded in the GUI."""
+    def load_folder(self, fldr: Folder) -> bool:
+        """Load the videos that scanning the given folder yielded in the GUI.
+
+        The rows are read from the database on the scan pool, the GUI thread
+        only gets to insert them into the stores.
+        """
+        self.scan_pool.submit(self._read_folder, fldr)
+        return False
+
+    def _read_folder(self, fldr: Folder) -> None:
+        """Read the rows for a Folder and its Videos and hand them to the GUI thread.
+
+        This method is intended to be run by the scan pool.
+        """
         self.log.debug("Loading data from folder %s (%d)", fldr.path, fldr.fid)
-        with self.db:
-            vids = self.db.video_get_by_folder(fldr)
+        try:
+            with self.db:
+                vids = self.db.video_get_by_folder(fldr)
+                tags = self.db.tag_link_get_by_folder(fldr)
+                people = self.db.person_link_get_by_folder(fldr)
+        except Exception as err:  # pylint: disable-msg=W0718
+            self.log.error("%s while loading folder %s: %s",
+                           err.__class__.__name__,
+                           fldr.path,
+                           err)
+            return
 
-        riter = self.root_store.append()
-        self.root_store.set(
-            riter,
-            (0, 1, 2, 3),
-            (fldr.fid,
-             fldr.path,
-             fldr.last_scan.strftime(common.TIME_FMT) if fldr.last_scan is not None else "",
-             fldr.remote))
+        glib.idle_add(self._apply_folder_rows, *_folder_rows(fldr, vids, tags, people))
 
-        for v in vids:
-            viter = self.vid_store.append()
-            tags = self.db.tag_link_get_by_vid(v)
-            # TODO Load data for tags and linked people
-            self.vid_store.set(
-                viter,
-                tuple(range(len(vid_cols))),
-                (v.vid,
-                 v.path,
-                 v.title,
-                 v.res_str,
-                 v.dur_str,
-                 ", ".join([x.name for x in tags]),
-                 ""),
-            )
+    def _apply_folder_rows(self,
+                           root_row: tuple,
+                           rows: list[tuple],
+                           tag_ids: dict[int, set[int]]) -> bool:
+        """Insert the rows _read_folder has prepared into the stores.
+
+        The Video rows are queued and inserted by _insert_vid_rows in chunks,
+        so a large Folder does not block the main loop. Videos that have a row
+        already are updated in place if their row has changed, so loading a
+        Folder twice is harmless.
+        """
+        fid: Final[int] = root_row[0]
+        if fid in self._root_iter:
+            self.root_store.set_row(self._root_iter[fid], root_row)
+        else:
+            self._root_iter[fid] = self.root_store.append(root_row)
+        self._vid_tags.update(tag_ids)
+        new_rows: list[tuple] = []
+        for r in rows:
+            viter = self._vid_iter.get(r[0])
+            if viter is None:
+                new_rows.append(r)
+            elif tuple(self.vid_store[viter]) != r:
+                self.vid_store.set_row(viter, r)
+        rows = new_rows
+        if not rows:
+            return False
+
+        self._pending_rows.extend(rows)
+        if self._vid_sort is None:
+            # Detach the model and switch off sorting while we insert the rows,
+            # so the view updates once, not once per Video.
+            self._vid_sort = self.vid_store.get_sort_column_id()
+            self.vid_view.freeze_child_notify()
+            self.vid_view.set_model(None)
+            self.vid_store.set_sort_column_id(gtk.TREE_SORTABLE_UNSORTED_SORT_COLUMN_ID,
+                                              gtk.SortType.ASCENDING)
+            glib.idle_add(self._insert_vid_rows)
+        return False
+
+    def _insert_vid_rows(self) -> bool:
+        # Passing the row to append() inserts and fills it with a single
+        # insert_with_valuesv() call, unlike append() followed by set().
+        append = self.vid_store.append
+        pop = self._pending_rows.popleft
+        vid_iter = self._vid_iter
+        for _ in range(min(insert_chunk_size, len(self._pending_rows))):
+            row = pop()
+            # The same Folder may have been queued twice.
+            if row[0] not in vid_iter:
+                vid_iter[row[0]] = append(row)
+
+        if self._pending_rows:
+            return True
+
+        assert self._vid_sort is not None
+        sort_col, sort_order = self._vid_sort
+        self._vid_sort = None
+        if sort_col is not None:
+            self.vid_store.set_sort_column_id(sort_col, sort_order)
+        self.vid_view.set_model(self._vid_model())
+        self.vid_view.thaw_child_notify()
+        return False
 
     def _handle_vid_view_click(self, _w, evt: gdk.Event) -> None:
         if evt.button != 3:
@@ -567,8 +898,9 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
         if pinfo is None:
             return
         path = pinfo[0]
-        cpath = self.vid_filter.convert_path_to_child_path(path)
-        tree_iter: gtk.TreeIter = self.vid_store.get_iter(cpath)
+        if self.vid_view.get_model() is self.vid_filter:
+            path = self.vid_filter.convert_path_to_child_path(path)
+        tree_iter: gtk.TreeIter = self.vid_store.get_iter(path)
 
         v_id: Final[int] = self.vid_store[tree_iter][0]
         vid = self.db.video_get_by_id(v_id)
@@ -586,7 +918,8 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
 
     def _mk_ctx_menu_vid(self, viter: gtk.TreeIter, vid: Video) \
             -> gtk.Menu:  # pylint: disable-msg=R0914
-        tags = self.db.tag_get_all_vid(vid)
+        tags = self._all_tags()
+        vid_tags = self._vid_tags.get(vid.vid, set())
 
         cmenu = gtk.Menu()
         tmenu = gtk.Menu()
@@ -594,41 +927,24 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
         titem = gtk.MenuItem.new_with_mnemonic("_Tags")
 
         for t in tags:
-            litem = gtk.CheckMenuItem.new_with_label(t[0].name)
-            litem.set_active(t[1] is not None)
+            is_linked = t.tid in vid_tags
+            litem = gtk.CheckMenuItem.new_with_label(t.name)
+            litem.set_active(is_linked)
             litem.connect("activate",
                           self.vid_toggle_tag,
                           viter,
                           vid,
-                          t)
+                          (t, is_linked))
             tmenu.add(litem)
 
         # Now we deal with people. I am not a people person (-ish)
+        # There is a submenu for every Person, so we only build them once the
+        # user actually goes for the People item.
         people_item = gtk.MenuItem.new_with_mnemonic("_People")
         people_menu = gtk.Menu()
-
-        people = self.db.person_get_all()
-        plinklist = self.db.person_link_get_by_video(vid)
-        plinks: defaultdict[int, list[str]] = defaultdict(list)
-
-        for lnk in plinklist:
-            plinks[lnk[0].pid].append(lnk[1])
-
-        for p in people:
-            rmenu = gtk.Menu()
-            ppitem = gtk.MenuItem.new_with_label(p.name)
-            ppitem.set_submenu(rmenu)
-            people_menu.add(ppitem)
-
-            for r in roles:
-                ritem = gtk.CheckMenuItem.new_with_label(r)
-                rmenu.add(ritem)
-                linked: bool = r in plinks[p.pid]
-                if linked:
-                    ritem.set_active(True)
-                ritem.connect("activate", self.handle_person_link_set, p, vid, r, not linked)
-
+        people_menu.add(gtk.MenuItem.new_with_label("..."))
         people_item.set_submenu(people_menu)
+        people_item.connect("select", self._populate_people_menu, people_menu, vid)
 
         play_item = gtk.MenuItem.new_with_mnemonic("_Play")
         # Register callback!
@@ -648,51 +964,75 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
 
         return cmenu
 
+    def _populate_people_menu(self, _item, people_menu: gtk.Menu, vid: Video) -> None:
+        """Fill the People submenu of the context menu for a Video on first use."""
+        if getattr(people_menu, "populated", False):
+            return
+        people_menu.populated = True
+        for child in people_menu.get_children():
+            people_menu.remove(child)
+
+        plinks = self._vid_people.get(vid.vid, set())
+        for p in self._all_people():
+            rmenu = gtk.Menu()
+            ppitem = gtk.MenuItem.new_with_label(p.name)
+            ppitem.set_submenu(rmenu)
+            people_menu.add(ppitem)
+
+            for r in roles:
+                ritem = gtk.CheckMenuItem.new_with_label(r)
+                rmenu.add(ritem)
+                linked: bool = (p.pid, r) in plinks
+                if linked:
+                    ritem.set_active(True)
+                ritem.connect("activate", self.handle_person_link_set, p, vid, r, not linked)
+
+        people_menu.show_all()
+
     def vid_toggle_tag(self,
                        _widget,
                        viter: gtk.TreeIter,
                        vid: Video,
-                       tag: tuple[Tag, Optional[int]]) -> None:
-        """Toggle the link between a Video and a Tag."""
-        op: Final[str] = "create" if tag[1] is None else "remove"
+                       tag: tuple[Tag, bool]) -> None:
+        """Toggle the link between a Video and a Tag.
+
+        tag is the Tag and whether it is currently attached to the Video.
+        """
+        op: Final[str] = "remove" if tag[1] else "create"
         with self.db:
-            if tag[1] is None:
+            if op == "create":
                 self.db.tag_link_create(tag[0], vid)
             else:
                 self.db.tag_link_remove(tag[0], vid)
 
             tags = self.db.tag_link_get_by_vid(vid)
+        self._vid_tags[vid.vid] = {x.tid for x in tags}
         tstr: str = ", ".join([x.name for x in tags])
         self.vid_store[viter][5] = tstr
 
         # Update Tag View
 
-        titer: gtk.TreeIter = self.tag_store.get_iter_first()
-        while self.tag_store[titer][0] != tag[0].tid:
-            titer = self.tag_store.iter_next(titer)
-
-        # Now we have the Iter for the Tag.
-        if op == "create":
-            niter = self.tag_store.append(titer)
-            self.tag_store.set(niter,
-                               (2, 3, 4, 5),
-                               (vid.vid,
-                                vid.dsp_title,
-                                vid.res_str,
-                                vid.dur_str))
+        key: Final[tuple[int, int]] = (tag[0].tid, vid.vid)
+        if tag[0].tid not in self._tag_loaded:
+            # If the Tag had no Videos so far, it needs an expander now. Otherwise
+            # there is nothing to do until the row is expanded.
+            titer: gtk.TreeIter = self._tag_iter[tag[0].tid]
+            if op == "create" and not self.tag_store.iter_has_child(titer):
+                self.tag_store.append(titer, [None, None, None, None, None, None])
+        elif op == "create":
+            self._tag_child_iter[key] = self.tag_store.append(
+                self._tag_iter[tag[0].tid],
+                [None, None, vid.vid, vid.dsp_title, vid.res_str, vid.dur_str])
         else:
-            diter: gtk.TreeIter = self.tag_store.iter_children(titer)
-            while self.tag_store[diter][2] != vid.vid:
-                diter = self.tag_store.iter_next(diter)
-            self.tag_store.remove(diter)
+            self.tag_store.remove(self._tag_child_iter.pop(key))
 
     def vid_hide_cb(self, _widget, vid: Video, viter: gtk.TreeIter) -> None:
         """Hide a Video."""
         with self.db:
             self.db.video_set_hidden(vid, True)
             self.vids[vid.vid].hidden = True
-            self.vid_filter.refilter()
-        # TODO Actually hide Video from TreeView!
+        # The filter drops the row as soon as its visible column changes.
+        self.vid_store[viter][vid_visible_col] = False
 
     def handle_create_tag(self, _ignore) -> None:
         """Facilitate the creation of a new Tag."""
@@ -727,44 +1067,29 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
             t = Tag(name=name)
             with self.db:
                 self.db.tag_add(t)
+            self._tags_cache = None
 
-            titer = self.tag_store.append(None)
-            self.tag_store.set(titer, (0, 1), (t.tid, t.name))
+            self._tag_iter[t.tid] = self.tag_store.append(
+                None,
+                [t.tid, t.name, None, None, None, None])
+            self._tag_loaded.add(t.tid)
         finally:
             self.log.debug("Phewww, that was some tagging, wasn't it?")
             dlg.destroy()
 
-    def _vid_visible_fn(self, model, viter: gtk.TreeIter, _ignore) -> bool:
-        if self.display_hidden:
-            return True
-
-        try:
-            v_id = model[viter][0]
-            if v_id not in self.vids:
-                return True  # ???
-
-            vid = self.vids[v_id]
-            return not vid.hidden
-        except TypeError as err:
-            self.log.error("%s in _vid_visible_fn: %s\n%s\n\n",
-                           err.__class__.__name__,
-                           err,
-                           krylib.fmt_err(err))
-            return True
-
     def _toggle_show_hidden_cb(self, _widget) -> None:
         self.display_hidden = not self.display_hidden
-        self.vid_filter.refilter()
-        self.cfg.update("GUI", "DisplayHidden", self.display_hidden)
+        # While Video rows are being inserted, vid_view is detached and gets
+        # the right model once they are done.
+        if self._vid_sort is None:
+            self.vid_view.set_model(self._vid_model())
 
     def vid_play(self, _ignore, v: Video) -> None:
-        """Start playing a Video."""
-        self.log.debug("Let's play!")
-        thr = Thread(target=self._play_file, args=(v, ), daemon=True)
-        thr.start()
+        """Start playing a Video.
 
-    def _play_file(self, v: Video) -> None:
-        """Play the Video."""
+        The player runs as a child process the main loop watches, so no thread
+        has to wait for it to exit.
+        """
         self.log.debug("About to play %s", v.dsp_title)
         cmd: list[str] = [
             "mpv",
@@ -772,12 +1097,23 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
             v.path,
         ]
 
-        res = subprocess.run(cmd,
-                             check=False,
-                             stdout=subprocess.DEVNULL,
-                             stderr=subprocess.DEVNULL)
-        msg = Message(MsgType.PlayFinished, res)
-        self.mq.put(msg)
+        try:
+            pid, *_ = glib.spawn_async(cmd,
+                                       flags=(glib.SpawnFlags.DO_NOT_REAP_CHILD
+                                              | glib.SpawnFlags.SEARCH_PATH
+                                              | glib.SpawnFlags.STDOUT_TO_DEV_NULL
+                                              | glib.SpawnFlags.STDERR_TO_DEV_NULL))
+        except glib.Error as err:
+            self.log.error("Cannot play %s: %s", v.dsp_title, err.message)
+            return
+
+        glib.child_watch_add(glib.PRIORITY_DEFAULT, pid, self._on_play_done, v)
+
+    def _on_play_done(self, pid: int, status: int, v: Video) -> None:
+        """Clean up after the player has exited."""
+        glib.spawn_close_pid(pid)
+        # We are on the GUI thread already, no need to go through notify().
+        self.handle_msg(Message(MsgType.PlayFinished, (v, status)))
 
     def handle_person_create(self, _ignore) -> None:
         """Prompt for a Person to create."""
@@ -822,13 +1158,11 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
 
             with self.db:
                 self.db.person_add(person)
+            self._people_cache = None
 
-            piter = self.person_store.append(None)
-            self.person_store.set(piter,
-                                  (0, 1, 2),
-                                  (person.pid,
-                                   person.name,
-                                   person.born))
+            self._person_iter[person.pid] = self.person_store.append(
+                None,
+                [person.pid, person.name, person.born, None, None, None, None, None])
         finally:
             self.log.debug("We may or may not have created a Person.")
             dlg.destroy()
@@ -841,13 +1175,17 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
             else:
                 self.db.person_link_remove(p, v, role)
 
-        piter = self.person_store.get_iter_first()
-        pid: int = self.person_store[piter][0]
+            people = self.db.person_link_get_by_video(v)
+        viter = self._vid_iter.get(v.vid)
+        if viter is not None:
+            self.vid_store[viter][6] = _people_str(people)
 
-        while pid != p.pid and piter is not None:
-            piter = self.person_store.iter_next(piter)
-            pid = self.person_store[piter][0]
+        if create:
+            self._vid_people[v.vid].add((p.pid, role))
+        else:
+            self._vid_people[v.vid].discard((p.pid, role))
 
+        piter = self._person_iter.get(p.pid)
         if piter is None:
             # This should not happen
             self.log.critical("CANTHAPPEN - Person %s (%d) not found in person_store",
@@ -855,21 +1193,20 @@ class GUI:  # pylint: disable-msg=I1101,E1101,R0902
                               p.pid)
             return
 
+        key: Final[tuple[int, int, str]] = (p.pid, v.vid, role)
         if create:
-            viter = self.person_store.append(piter)
-            self.person_store.set(viter,
-                                  (3, 4, 5, 6, 7),
-                                  (role,
-                                   v.vid,
-                                   v.dsp_title,
-                                   v.res_str,
-                                   v.dur_str))
-        else:
-            viter = self.person_store.iter_nth_child(piter, 0)
-            while viter is not None and self.person_store[viter][4] != v.vid:
-                viter = self.person_store.iter_next(viter)
-
-            self.person_store.remove(viter)
+            self._person_child_iter[key] = self.person_store.append(
+                piter,
+                [None,
+                 None,
+                 None,
+                 role,
+                 v.vid,
+                 v.dsp_title,
+                 v.res_str,
+                 v.dur_str])
+        elif key in self._person_child_iter:
+            self.person_store.remove(self._person_child_iter.pop(key))
 
 
 if __name__ == '__main__':
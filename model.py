@@ -21,8 +21,18 @@ This module provides the domain-specific data types for use in our application.
 import os
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from typing import NamedTuple, Optional
 
+from hollywoo import common
+
+
+# A library holds few distinct resolutions, so the formatted strings are
+# cached and shared between Videos.
+@lru_cache(maxsize=256)
+def _res_str(x: int, y: int) -> str:
+    return f"{x}x{y}"
+
 
 class Resolution(NamedTuple):
     """Resolution is the size of a Video in pixels."""
@@ -31,10 +41,10 @@ class Resolution(NamedTuple):
     y: int
 
     def __str__(self) -> str:
-        return f"{self.x}x{self.y}"
+        return _res_str(self.x, self.y)
 
     def __repr__(self) -> str:
-        return f"{self.x}x{self.y}"
+        return _res_str(self.x, self.y)
 
 
 @dataclass(slots=True, kw_only=True)
@@ -46,6 +56,13 @@ class Folder:
     last_scan: Optional[datetime] = None
     remote: bool = False
 
+    @property
+    def last_scan_str(self) -> str:
+        """Return the time of the last scan as a human-readable string."""
+        if self.last_scan is None:
+            return ""
+        return self.last_scan.strftime(common.TIME_FMT)
+
 
 @dataclass(slots=True, kw_only=True)
 class Video:
@@ -59,14 +76,17 @@ class Video:
     title: Optional[str] = None
     cksum: Optional[str] = None
     resolution: Resolution
-    duration: int  # duration in milliseconds
+    duration: Optional[int]  # duration in milliseconds
     hidden: bool = False
+    # Not stored in the database, it is filled in by the Scanner or on first use.
+    size_bytes: Optional[int] = field(default=None, compare=False, repr=False)
 
     @property
     def size(self) -> int:
         """Get the Video's size, in bytes."""
-        st = os.stat(self.path)
-        return st.st_size
+        if self.size_bytes is None:
+            self.size_bytes = os.stat(self.path).st_size
+        return self.size_bytes
 
     @property
     def dur_str(self) -> str:
@@ -93,7 +113,7 @@ class Video:
     @property
     def res_str(self) -> str:
         """Return the stringified resolution."""
-        return f"{self.resolution.x}x{self.resolution.y}"
+        return _res_str(self.resolution.x, self.resolution.y)
 
 
 @dataclass(slots=True, kw_only=True)
@@ -18,10 +18,10 @@ hollywoo.scanner
 
 import logging
 import os
-import re
-from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Final, Optional
+from threading import Event
+from typing import Final, Iterator, NamedTuple, Optional
 
 from pymediainfo import MediaInfo
 
@@ -30,8 +30,24 @@ from hollywoo.database import Database
 from hollywoo.model import Folder, Resolution, Video
 
 min_size: Final[int] = 1024 * 1024 * 100  # 100MiB
-suffix_pat: Final[re.Pattern] = \
-    re.compile(r"[.](avi|mp4|m[4k]v|mpe?g|wmv|m2ts)$", re.I)
+walk_workers: Final[int] = 8
+meta_workers: Final[int] = 16
+commit_batch: Final[int] = 64
+video_suffixes: Final[frozenset[str]] = frozenset({
+    ".avi", ".mp4", ".m4v", ".mkv", ".mpg", ".mpeg", ".wmv", ".m2ts",
+})
+
+
+class MetaInfo(NamedTuple):
+    """MetaInfo holds the metadata MediaInfo found in a video file."""
+
+    resolution: Optional[Resolution] = None
+    duration: Optional[int] = None
+    title: Optional[str] = None
+    performer: Optional[str] = None
+
+
+no_meta: Final[MetaInfo] = MetaInfo()
 
 
 class Scanner:
@@ -40,32 +56,80 @@ class Scanner:
     path: str
     db: Database
     log: logging.Logger
-    _cache: dict
+    stop: Event
 
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, stop: Optional[Event] = None) -> None:
         self.path = path
         self.db = Database()
         self.log = common.get_logger("scanner")
-        self._cache = {}
+        # Once stop is set, the scan ends as soon as possible, without
+        # recording the Folder as scanned.
+        self.stop = stop if stop is not None else Event()
 
         if not os.path.isdir(path):
             raise ValueError(f"{path} is not a directory")
 
-    def stat(self, path: str) -> os.stat_result:
-        """Attempt to get a file's filesystem metadata."""
-        if path in self._cache:
-            return self._cache[path]
+    def _walk(self, path: str) -> Iterator[tuple[str, os.stat_result]]:
+        """Yield the path and metadata of the files below path that are not skipped.
+
+        The directories are read on a thread pool, so on a remote Folder we do
+        not wait for one directory after the other. We take the most recently
+        discovered directory first, so the traversal stays depth-first.
+        """
+        pool: Final = ThreadPoolExecutor(max_workers=walk_workers,
+                                         thread_name_prefix="walk")
+        try:
+            pending = [pool.submit(self._read_dir, path)]
+            while pending and not self.stop.is_set():
+                files, subdirs = pending.pop().result()
+                pending.extend(pool.submit(self._read_dir, d) for d in subdirs)
+                yield from files
+        finally:
+            # If the caller stops early, the directories that are still
+            # queued need not be read.
+            pool.shutdown(cancel_futures=True)
+
+    def _read_dir(self, path: str) -> tuple[list[tuple[str, os.stat_result]], list[str]]:
+        """Return the files in a directory that are not skipped, and its subdirectories.
 
-        s = os.stat(path)
-        self._cache[path] = s
-        return s
+        Like os.walk, this does not follow symlinks to directories, and it skips
+        directories it cannot read.
+        """
+        files: list[tuple[str, os.stat_result]] = []
+        subdirs: list[str] = []
+        try:
+            # When scandir is given a file descriptor, the DirEntries stat their
+            # files relative to it, so the kernel does not have to resolve the
+            # full path for every file.
+            fd: Final[int] = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                with os.scandir(fd) as entries:
+                    for entry in entries:
+                        entry_path = os.path.join(path, entry.name)
+                        # A file may vanish or be unreadable, that should not
+                        # cost us the rest of the directory.
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry_path)
+                            elif entry.is_file() and not self.skip_file(entry):
+                                files.append((entry_path, entry.stat()))
+                        except OSError as err:
+                            self.log.error("Cannot stat %s: %s", entry_path, err)
+            finally:
+                os.close(fd)
+        except OSError as err:
+            self.log.error("Cannot read directory %s: %s", path, err)
+        return files, subdirs
 
-    def skip_file(self, f: str) -> bool:
+    def skip_file(self, f: os.DirEntry) -> bool:
         """Return True if the file f is to be skipped."""
-        if suffix_pat.search(f) is None:
+        # Check the name first, it does not cost a system call.
+        name: Final[str] = f.name
+        if name[name.rfind("."):].lower() not in video_suffixes:
             return True
 
-        s = self.stat(f)
+        # The DirEntry caches the result of stat.
+        s = f.stat()
         if s.st_size < min_size:
             return True
 
@@ -73,6 +137,14 @@ class Scanner:
 
     def scan(self) -> Folder:
         """Run the scanner on the given directory tree."""
+        try:
+            return self._scan()
+        finally:
+            # The Database belongs to this Scanner, so its connection would
+            # not be used again.
+            self.db.close()
+
+    def _scan(self) -> Folder:
         self.log.debug("Scan %s", self.path)
         with self.db:
             root = self.db.folder_get_by_path(self.path)
@@ -81,63 +153,114 @@ class Scanner:
                     path=self.path
                 )
                 self.db.folder_add(root)
-            for dirpath, _folders, files in os.walk(self.path):
-                for f in files:
-                    full_path = os.path.join(dirpath, f)
-                    if self.skip_file(full_path):
-                        continue
-                    st = self.stat(full_path)
-                    mtime = datetime.fromtimestamp(st.st_mtime)
-
-                    vid: Optional[Video] = self.db.video_get_by_path(full_path)
-                    if vid is not None:
-                        self.log.debug("Video %s is already in database (%d)",
-                                       full_path,
-                                       vid.vid)
-                        if mtime > vid.mtime:
-                            self.db.video_set_mtime(vid, mtime)
-
-                    # Attempt to extract metadata
-                    meta = self._get_metadata(full_path)
-                    if meta["resolution"] is None:
-                        self.log.info("Cannot determine resolution of %s",
-                                      full_path)
-                        meta["resolution"] = Resolution(0, 0)
-
-                    vid = Video(
-                        folder_id=root.fid,
-                        path=full_path,
-                        mtime=mtime,
-                        resolution=meta["resolution"],
-                        duration=meta["duration"],
-                    )
-
-                    self.log.debug("Add Video %s to database", full_path)
-                    self.db.video_add(vid)
-                    if meta["title"] is not None and len(meta["title"]) > 0:
-                        self.log.debug("Set title for %s => %s",
-                                       full_path,
-                                       meta["title"])
-                        self.db.video_set_title(vid, meta["title"])
+        mtimes: list[tuple[Video, datetime]] = []
+        # Looking up the known Videos one by one would cost a query per file.
+        # A Folder nested inside another one may have turned up some of the
+        # files already, so we load everything below our path.
+        known: Final[dict[str, Video]] = \
+            {v.path: v for v in self.db.video_get_by_path_prefix(self.path)}
+        # MediaInfo spends most of its time waiting for the disk, so we
+        # extract the metadata on a thread pool, while we keep walking.
+        with ThreadPoolExecutor(max_workers=meta_workers,
+                                thread_name_prefix="meta") as pool:
+            found: list[tuple[str, datetime, int, Future[MetaInfo]]] = []
+            # _walk ends early if we are told to stop.
+            for full_path, st in self._walk(self.path):
+                # The database stores whole seconds, so truncate here, too,
+                # or every file would look modified on the next scan.
+                stamp: int = int(st.st_mtime)
+
+                vid: Optional[Video] = known.get(full_path)
+                if vid is not None:
+                    self.log.debug("Video %s is already in database (%d)",
+                                   full_path,
+                                   vid.vid)
+                    if stamp > vid.mtime.timestamp():
+                        mtimes.append((vid, datetime.fromtimestamp(stamp)))
+                    # The Video has a row already, so there is nothing to
+                    # add, and no need to have MediaInfo look at it again.
+                    continue
+
+                # Attempt to extract metadata
+                found.append((full_path,
+                              datetime.fromtimestamp(stamp),
+                              st.st_size,
+                              pool.submit(self._get_metadata, full_path)))
+                # We keep a batch in flight on the pool while we store
+                # the one before it.
+                if len(found) >= 2 * commit_batch:
+                    self._add_found(root, found[:commit_batch])
+                    del found[:commit_batch]
+
+            if self.stop.is_set():
+                pool.shutdown(wait=False, cancel_futures=True)
+            else:
+                self._add_found(root, found)
+
+        if self.stop.is_set():
+            self.log.info("Scan of %s was stopped", self.path)
+            return root
+
+        with self.db:
+            self.db.video_set_mtime_many(mtimes)
             self.db.folder_update_scan(root, datetime.now())
-        self._cache.clear()
         return root
 
-    def _get_metadata(self, vid: str) -> defaultdict:
+    def _add_found(self,
+                   root: Folder,
+                   found: list[tuple[str, datetime, int, Future[MetaInfo]]]) -> None:
+        """Add a batch of newly found Videos to the database and commit.
+
+        Committing every batch keeps the transactions small, and an interrupted
+        scan does not lose the Videos it has stored already.
+        """
+        new_vids: list[Video] = []
+        titles: list[tuple[Video, str]] = []
+        for full_path, mtime, size, fut in found:
+            meta = fut.result()
+            res: Optional[Resolution] = meta.resolution
+            if res is None:
+                self.log.info("Cannot determine resolution of %s",
+                              full_path)
+                res = Resolution(0, 0)
+
+            vid = Video(
+                folder_id=root.fid,
+                path=full_path,
+                mtime=mtime,
+                resolution=res,
+                duration=meta.duration,
+                size_bytes=size,
+            )
+
+            self.log.debug("Add Video %s to database", full_path)
+            new_vids.append(vid)
+            if meta.title is not None and len(meta.title) > 0:
+                self.log.debug("Set title for %s => %s",
+                               full_path,
+                               meta.title)
+                titles.append((vid, meta.title))
+
+        with self.db:
+            # The titles can only be set once the Videos have their IDs.
+            self.db.video_add_many(new_vids)
+            self.db.video_set_title_many(titles)
+
+    def _get_metadata(self, vid: str) -> MetaInfo:
         try:
             m = MediaInfo.parse(vid)
-            info: defaultdict = defaultdict(lambda: None)
             if len(m.video_tracks) == 0 or len(m.general_tracks) == 0:
-                return info
-            info["resolution"] = Resolution(m.video_tracks[0].width,
-                                            m.video_tracks[0].height)
-            info["duration"] = m.video_tracks[0].duration
-            info["title"] = m.general_tracks[0].title or m.general_tracks[0].movie_name
-            info["performer"] = m.general_tracks[0].performer
+                return no_meta
+            vtrack = m.video_tracks[0]
+            gtrack = m.general_tracks[0]
+            return MetaInfo(
+                resolution=Resolution(vtrack.width, vtrack.height),
+                duration=vtrack.duration,
+                title=gtrack.title or gtrack.movie_name,
+                performer=gtrack.performer,
+            )
         except UnicodeEncodeError:
-            return defaultdict(lambda: None)
-
-        return info
+            return no_meta
 
 
 # Local Variables: #
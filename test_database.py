@@ -19,12 +19,14 @@ hollywoo.test_database
 import os
 import sqlite3
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
+from threading import Thread
 from typing import Final, Optional
+from unittest import mock
 
-from hollywoo import common
-from hollywoo.database import Database
-from hollywoo.model import Folder
+from hollywoo import common, database
+from hollywoo.database import Database, DBError
+from hollywoo.model import Folder, Person, Resolution, Tag, Video
 
 TEST_DIR: Final[str] = os.path.join(
     "/tmp",
@@ -36,6 +38,7 @@ class DBTest(unittest.TestCase):
 
     conn: Optional[Database] = None
     folders: list[Folder] = []
+    vids: list[Video] = []
 
     @classmethod
     def setUpClass(cls) -> None:
@@ -45,6 +48,8 @@ class DBTest(unittest.TestCase):
     @classmethod
     def tearDownClass(cls) -> None:
         """Clean up the mess."""
+        if cls.conn is not None:
+            cls.conn.close()
         os.system(f'rm -rf "{TEST_DIR}"')
 
     @classmethod
@@ -144,6 +149,222 @@ class DBTest(unittest.TestCase):
                 self.assertEqual(f2.last_scan,
                                  datetime.fromtimestamp(int(f1.last_scan.timestamp())))
 
+    def test_05_video_add_many(self) -> None:
+        """Test adding several Videos at once."""
+        db: Database = self.db()
+        now: Final[datetime] = datetime.fromtimestamp(int(datetime.now().timestamp()))
+
+        for f in self.folders:
+            for i in range(10):
+                v = Video(
+                    folder_id=f.fid,
+                    path=os.path.join(f.path, f"video{i:02d}.mp4"),
+                    mtime=now,
+                    resolution=Resolution(1920, 1080),
+                    duration=(i + 1) * 60_000,
+                )
+                self.vids.append(v)
+
+        with db:
+            db.video_add_many(self.vids)
+
+        self.assertEqual(len({v.vid for v in self.vids}), len(self.vids))
+
+        for v1 in self.vids:
+            self.assertGreater(v1.vid, 0)
+            v2 = db.video_get_by_id(v1.vid)
+            self.assertIsNotNone(v2)
+            assert v2 is not None
+            self.assertEqual(v1.path, v2.path)
+            self.assertEqual(v1.folder_id, v2.folder_id)
+            self.assertEqual(v1.mtime, v2.mtime)
+            self.assertEqual(v1.resolution, v2.resolution)
+            self.assertEqual(v1.duration, v2.duration)
+
+    def test_06_video_get_by_folder(self) -> None:
+        """Test loading the Videos of a Folder by Folder, path, and ID."""
+        db: Database = self.db()
+
+        for f in self.folders:
+            expected = sorted(v.path for v in self.vids if v.folder_id == f.fid)
+            for key in (f, f.path, f.fid):
+                vids = db.video_get_by_folder(key)
+                self.assertEqual([v.path for v in vids], expected)
+
+    def test_07_tag_link_create_many(self) -> None:
+        """Test attaching a Tag to several Videos at once."""
+        db: Database = self.db()
+        t: Tag = Tag(name="Bulk")
+
+        with db:
+            db.tag_add(t)
+            db.tag_link_create_many((t, v) for v in self.vids[::2])
+
+        tagged = db.tag_link_get_by_tag(t)
+        self.assertCountEqual([v.vid for v in tagged],
+                              [v.vid for v in self.vids[::2]])
+
+    def test_08_tag_link_get_by_folder(self) -> None:
+        """Test loading the Tags for all Videos in a Folder at once."""
+        db: Database = self.db()
+        tagged: Final[set[int]] = {v.vid for v in self.vids[::2]}
+
+        for f in self.folders:
+            tags = db.tag_link_get_by_folder(f)
+            for v in self.vids:
+                if v.folder_id != f.fid:
+                    self.assertNotIn(v.vid, tags)
+                elif v.vid in tagged:
+                    self.assertEqual([t.name for t in tags[v.vid]], ["Bulk"])
+                else:
+                    self.assertNotIn(v.vid, tags)
+
+    def test_10_tag_link_get_tag_ids(self) -> None:
+        """Test getting the IDs of the Tags that are in use."""
+        db: Database = self.db()
+        unused: Tag = Tag(name="Unused")
+
+        with db:
+            db.tag_add(unused)
+
+        ids = db.tag_link_get_tag_ids()
+        for t in db.tag_get_all():
+            self.assertEqual(t.tid in ids, t.tid != unused.tid)
+
+    def test_11_video_delete_many(self) -> None:
+        """Test deleting several Videos at once."""
+        db: Database = self.db()
+        doomed: Final[list[Video]] = self.vids[-3:]
+
+        with db:
+            cnt = db.video_delete_many(doomed)
+
+        self.assertEqual(cnt, len(doomed))
+        for v in doomed:
+            self.assertIsNone(db.video_get_by_id(v.vid))
+        for v in self.vids[:-3]:
+            self.assertIsNotNone(db.video_get_by_id(v.vid))
+        del self.vids[-3:]
+
+    def test_12_tag_link_get_all_by_vid(self) -> None:
+        """Test loading the Tags for all Videos at once."""
+        db: Database = self.db()
+        tags = db.tag_link_get_all_by_vid()
+
+        for f in self.folders:
+            for v_id, ts in db.tag_link_get_by_folder(f).items():
+                self.assertEqual([t.tid for t in tags[v_id]], [t.tid for t in ts])
+        self.assertEqual(set(tags), {v.vid for v in self.vids[::2]})
+
+    def test_13_person_link_get_all(self) -> None:
+        """Test loading the Videos for all People at once."""
+        db: Database = self.db()
+        p: Person = Person(name="Alan Smithee")
+
+        with db:
+            db.person_add(p)
+            db.person_link_add(p, self.vids[0], "Director")
+            db.person_link_add(p, self.vids[1], "Actor")
+
+        links = db.person_link_get_all()
+        self.assertCountEqual([(v.vid, role) for v, role in links[p.pid]],
+                              [(self.vids[0].vid, "Director"), (self.vids[1].vid, "Actor")])
+
+    def test_14_video_set_many(self) -> None:
+        """Test setting the titles and mtimes of several Videos at once."""
+        db: Database = self.db()
+        later: Final[datetime] = self.vids[0].mtime + timedelta(days=1)
+        targets: Final[list[Video]] = self.vids[:5]
+
+        with db:
+            db.video_set_title_many((v, f"Title {i}") for i, v in enumerate(targets))
+            db.video_set_mtime_many((v, later) for v in targets)
+
+        for i, v1 in enumerate(targets):
+            v2 = db.video_get_by_id(v1.vid)
+            assert v2 is not None
+            self.assertEqual(v2.title, f"Title {i}")
+            self.assertEqual(v2.mtime, later)
+            self.assertEqual(v1.title, v2.title)
+            self.assertEqual(v1.mtime, v2.mtime)
+
+    def test_15_read_sees_other_threads(self) -> None:
+        """Test that a read does not hide later commits from other threads."""
+        db: Database = self.db()
+        before: Final[int] = len(db.video_get_by_folder(self.folders[0]))
+        v = Video(
+            folder_id=self.folders[0].fid,
+            path=os.path.join(self.folders[0].path, "threaded.mp4"),
+            mtime=datetime.fromtimestamp(int(datetime.now().timestamp())),
+            resolution=Resolution(1280, 720),
+            duration=60_000,
+        )
+
+        def add() -> None:
+            with db:
+                db.video_add(v)
+            db.close()
+
+        worker = Thread(target=add)
+        worker.start()
+        worker.join()
+
+        self.assertEqual(len(db.video_get_by_folder(self.folders[0])), before + 1)
+        self.assertIsNotNone(db.video_get_by_id(v.vid))
+        self.vids.append(v)
+
+    def test_16_video_get_by_path_prefix(self) -> None:
+        """Test loading the Videos below a directory."""
+        db: Database = self.db()
+
+        for f in self.folders:
+            expected = [v.vid for v in self.vids if v.path.startswith(f.path + "/")]
+            for path in (f.path, f.path + "/"):
+                vids = db.video_get_by_path_prefix(path)
+                self.assertCountEqual([v.vid for v in vids], expected)
+
+        self.assertEqual(db.video_get_by_path_prefix("/data/vid"), [])
+
+    def test_17_video_get_by_unknown_folder(self) -> None:
+        """Test that loading the Videos of an unknown Folder path fails cleanly."""
+        db: Database = self.db()
+
+        with self.assertRaises(DBError):
+            db.video_get_by_folder("/no/such/folder")
+
+    def test_18_create_db_rolls_back(self) -> None:
+        """Test that a failed schema creation leaves no tables behind."""
+        path: Final[str] = os.path.join(TEST_DIR, "broken.db")
+        broken: Final[tuple[str, ...]] = database.qinit + ("CREATE TABLE folder (id)", )
+
+        # Keep the file around, so we can look inside.
+        with mock.patch.object(database, "qinit", broken), \
+                mock.patch.object(database.os, "remove"):
+            with self.assertRaises(DBError):
+                Database(path)
+
+        conn = sqlite3.connect(path)
+        try:
+            tables = conn.execute("SELECT name FROM sqlite_master").fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(tables, [])
+
+    def test_19_person_link_get_all_by_vid(self) -> None:
+        """Test loading the People for all Videos at once."""
+        db: Database = self.db()
+        links = db.person_link_get_all_by_vid()
+
+        self.assertEqual([(p.name, role) for p, role in links[self.vids[0].vid]],
+                         [("Alan Smithee", "Director")])
+        self.assertEqual([(p.name, role) for p, role in links[self.vids[1].vid]],
+                         [("Alan Smithee", "Actor")])
+        for f in self.folders:
+            for v_id, ps in db.person_link_get_by_folder(f).items():
+                self.assertEqual([(p.pid, role) for p, role in links[v_id]],
+                                 [(p.pid, role) for p, role in ps])
+        self.assertEqual(set(links), {self.vids[0].vid, self.vids[1].vid})
+
 
 # Local Variables: #
 # python-indent: 4 #